@@ -44,7 +44,7 @@ def map_bp_str_of_connection(net, inter_nodes):
                 str_of_connection[v2][v1] += 1
 
     for i_node in inter_nodes:
-        nbors = net.find_neighbors(i_node)
+        nbors = list(net.find_neighbors(i_node))
         for i in range(len(nbors)-1):
             for j in range(i+1, len(nbors)):
                 strengthen_connection(nbors[i], nbors[j])
@@ -6,44 +6,118 @@ Heap
 KeyValueHeap
 HeapOfTuples
 """
+import heapq
+
+
+# Index of the parent of heap position i. The heapify loops inline this
+# and the child arithmetic (2*i+1, 2*i+2).
+def _parent(i):
+    return (i-1) >> 1
+
+
 class Heap:
     """
+    A min-heap.
+
+    With the default is_less_than, insert and pop go through the heapq
+    C implementation until index() is first called; from then on (and
+    always, in subclasses that override is_less_than) the heap is
+    maintained in Python so that element positions can be tracked.
+
     Methods:
     insert
     pop
     index
+    decrease_key
     list
     check_heap_property
     is_less_than
     """
     def __init__(self, elements=None, is_heap=False):
         self._heap = []
+        self._pos = None
+        self._use_heapq = type(self).is_less_than is Heap.is_less_than
 
         if elements is not None:
             if is_heap:
                 self._heap = elements[:]
 
+            elif self._use_heapq:
+                self._heap = list(elements)
+                heapq.heapify(self._heap)
+
             else:
                 for el in elements:
                     self.insert(el)
 
     def insert(self, element):
+        if self._use_heapq:
+            heapq.heappush(self._heap, element)
+            return
         self._heap.append(element)
+        self._track(element, len(self._heap)-1)
         self._up_heapify(len(self._heap)-1)
 
     def index(self, element):
-        return self._heap.index(element)
+        """
+        Return the position of element in the heap list.
+
+        The first call maps every element to its position, and the map is
+        then kept up to date by every heap operation, so lookups are O(1).
+        Unhashable elements can't be mapped, and a duplicate loses its entry
+        when an equal element leaves the heap; both are found by scanning
+        the list instead.
+        """
+        if self._pos is None:
+            try:
+                self._pos = {el: i for i, el in enumerate(self._heap)}
+            except TypeError:
+                return self._heap.index(element)
+            self._use_heapq = False
+        try:
+            return self._pos[element]
+        except (KeyError, TypeError):
+            pass
+        try:
+            i = self._heap.index(element)
+        except ValueError:
+            raise ValueError('{} is not in heap'.format(element)) from None
+        self._pos[element] = i
+        return i
+
+    def _track(self, element, i):
+        """Record that element is at position i, if positions are mapped."""
+        if self._pos is not None:
+            try:
+                self._pos[element] = i
+            except TypeError:
+                # an unhashable element: stop mapping, index() will scan
+                self._pos = None
+
+    def decrease_key(self, element, new_element):
+        """Replace element by new_element, which must not compare greater."""
+        i = self.index(element)
+        if self._pos is not None and self._pos.get(element) == i:
+            del self._pos[element]
+        self._heap[i] = new_element
+        self._track(new_element, i)
+        self._up_heapify(i)
 
     def pop(self):
-        if len(self._heap) == 1:
-            return self._heap.pop()
-        elif len(self._heap) == 0:
+        if len(self._heap) == 0:
             return None
-        else:
-            val = self._heap[0]
-            self._heap[0] = self._heap.pop()
+        if self._use_heapq:
+            return heapq.heappop(self._heap)
+
+        val = self._heap[0]
+        last = self._heap.pop()
+        if self._pos is not None and self._pos.get(val) == 0:
+            del self._pos[val]
+        if len(self._heap) > 0:
+            self._heap[0] = last
+            self._track(last, 0)
             self._down_heapify(0)
-            return val
+        return val
 
     def __len__(self):
         return len(self._heap)
@@ -53,81 +127,56 @@ class Heap:
 
     def _up_heapify(self, i):
         L = self._heap
-        parent = self._parent
+        pos = self._pos
         is_less_than = self.is_less_than
 
         while i > 0:
-            if is_less_than(L[i],  L[parent(i)]):
-                L[i], L[parent(i)] = L[parent(i)], L[i]
-                i = parent(i)
+            i_parent = (i-1) >> 1
+            if is_less_than(L[i],  L[i_parent]):
+                L[i], L[i_parent] = L[i_parent], L[i]
+                if pos is not None:
+                    pos[L[i]] = i
+                    pos[L[i_parent]] = i_parent
+                i = i_parent
             else:
                 break
         return
 
     def _down_heapify(self, i):
         L = self._heap
-        lchild = self._left_child
-        rchild = self._right_child
+        n = len(L)
+        pos = self._pos
         is_less_than = self.is_less_than
-        one_child = self._one_child
-        is_leaf = self._is_leaf
 
-        while i < len(L)-1:
-            if is_leaf(i):
+        while True:
+            i_child = 2*i + 1
+            if i_child >= n:
                 break
-            else:
-                if one_child(i):
-                    if is_less_than(L[lchild(i)], L[i]):
-                        L[i], L[lchild(i)] = L[lchild(i)], L[i]
-                    break
-                else:
-                    # Find smallest child
-                    if is_less_than(L[rchild(i)], L[lchild(i)]):
-                        i_child = rchild(i)
-                    else:
-                        i_child = lchild(i)
-
-                    # If the smallest child is smaller, swap
-                    if is_less_than(L[i_child], L[i]):
-                        L[i], L[i_child] = L[i_child], L[i]
-                        i = i_child
-                    else:
-                        break
 
+            # Find smallest child
+            if i_child + 1 < n and is_less_than(L[i_child + 1], L[i_child]):
+                i_child += 1
+
+            # If the smallest child is smaller, swap
+            if is_less_than(L[i_child], L[i]):
+                L[i], L[i_child] = L[i_child], L[i]
+                if pos is not None:
+                    pos[L[i]] = i
+                    pos[L[i_child]] = i_child
+                i = i_child
+            else:
+                break
 
     def is_less_than(self, el1, el2):
         return el1 < el2
 
-    @staticmethod
-    def _parent(i): 
-        return (i-1)//2
-
-    @staticmethod
-    def _left_child(i): 
-        return 2*i+1
-
-    @staticmethod
-    def _right_child(i): 
-        return 2*i+2
-
-    def _is_leaf(self, i): 
-        return (2*i+2 >= len(self._heap)) and (2*i+1 >= len(self._heap))
-
-    def _one_child(self, i): 
-        return (2*i+1 < len(self._heap)) and (2*i+2 >= len(self._heap))
-
     def check_heap_property(self):
-        i = 0
+        L = self._heap
+        n = len(L)
 
-        while not self._is_leaf(i):
-            if self.is_less_than(self._heap[self._left_child(i)], self._heap[i]):
+        for i in range(1, n):
+            if self.is_less_than(L[i], L[_parent(i)]):
                 return False
-            try:
-                if self.is_less_than(self._heap[self._right_child(i)], self._heap[i]):
-                    return False
-            except IndexError:
-                pass
-            i += 1
 
         return True
 
@@ -140,6 +189,7 @@ class KeyValueHeap(Heap):
     insert
     pop
     index
+    decrease_key
     list
     check_heap_property
     __init__
@@ -156,23 +206,28 @@ class KeyValueHeap(Heap):
     def keys(self):
         i = 0
         while i < len(self._heap):
-        	i += 1
             yield self._heap[i]
+            i += 1
     
 
 class HeapOfTuples(Heap):
     """
     A heap of tuples.
 
+    The compared item of each tuple is kept in a list parallel to the
+    heap, so the heapify loops compare keys directly instead of indexing
+    two tuples through is_less_than at every level.
+
     Methods inherited from Heap:
-    insert
-    pop
     index
     list
     check_heap_property
 
     Extended methods:
     __init__
+    insert
+    pop
+    decrease_key
 
     Overriden methods:
     is_less_than
@@ -185,11 +240,73 @@ class HeapOfTuples(Heap):
         is_heap -- set to True is elements is already a heap
         """
         self.i_val = i_val
+        self._keys = []
         super().__init__(elements=elements, is_heap=is_heap)
+        if is_heap and elements is not None:
+            self._keys = [el[i_val] for el in self._heap]
+
+    def insert(self, element):
+        self._keys.append(element[self.i_val])
+        super().insert(element)
+
+    def pop(self):
+        keys = self._keys
+        if len(keys) > 0:
+            last = keys.pop()
+            if len(keys) > 0:
+                keys[0] = last
+        return super().pop()
+
+    def decrease_key(self, element, new_element):
+        self._keys[self.index(element)] = new_element[self.i_val]
+        super().decrease_key(element, new_element)
 
     def is_less_than(self, el1, el2):
         return el1[self.i_val] < el2[self.i_val]
 
+    def _up_heapify(self, i):
+        L = self._heap
+        K = self._keys
+        pos = self._pos
+
+        while i > 0:
+            i_parent = (i-1) >> 1
+            if K[i] < K[i_parent]:
+                L[i], L[i_parent] = L[i_parent], L[i]
+                K[i], K[i_parent] = K[i_parent], K[i]
+                if pos is not None:
+                    pos[L[i]] = i
+                    pos[L[i_parent]] = i_parent
+                i = i_parent
+            else:
+                break
+
+    def _down_heapify(self, i):
+        L = self._heap
+        K = self._keys
+        n = len(L)
+        pos = self._pos
+
+        while True:
+            i_child = 2*i + 1
+            if i_child >= n:
+                break
+
+            # Find smallest child
+            if i_child + 1 < n and K[i_child + 1] < K[i_child]:
+                i_child += 1
+
+            # If the smallest child is smaller, swap
+            if K[i_child] < K[i]:
+                L[i], L[i_child] = L[i_child], L[i]
+                K[i], K[i_child] = K[i_child], K[i]
+                if pos is not None:
+                    pos[L[i]] = i
+                    pos[L[i_child]] = i_child
+                i = i_child
+            else:
+                break
+
 
 import random
 
@@ -203,6 +320,24 @@ def test1():
 
     assert heap.check_heap_property()
 
+    x = heap.list()[-1]
+    assert heap.list()[heap.index(x)] == x
+    heap.insert(-1)
+    assert heap.check_heap_property()
+    assert heap.pop() == -1
+
+    # duplicates stay findable after an equal element is replaced or popped
+    heap = Heap([5, 5, 5, 7, 7])
+    assert heap.list()[heap.index(5)] == 5
+    heap.decrease_key(5, 1)
+    assert heap.list()[heap.index(5)] == 5
+    heap.pop()
+    heap.pop()
+    assert heap.list()[heap.index(5)] == 5
+    heap.decrease_key(7, 2)
+    assert heap.list()[heap.index(7)] == 7
+    assert [heap.pop() for i in range(3)] == [2, 5, 7]
+
 
 def test2():
     heap = HeapOfTuples(0)
@@ -214,7 +349,36 @@ def test2():
 
     assert heap.check_heap_property()
 
+    # lists can't be mapped to positions, index() scans for them
+    heap = KeyValueHeap([[2, 'a'], [1, 'b']])
+    assert heap.index([1, 'b']) == 0
+    heap.decrease_key([2, 'a'], [0, 'a'])
+    assert heap.pop() == [0, 'a']
+
+
+def test3():
+    elements = [(i, random.randint(0, 30000)) for i in range(999)]
+    # the largest key, never decreased, so it stays in the heap until last
+    elements.append((999, 30001))
+    heap = HeapOfTuples(1, elements=elements)
+
+    for i in range(0, 1000, 7):
+        old = heap.list()[heap.index(elements[i])]
+        elements[i] = (i, old[1] - random.randint(0, 30000))
+        heap.decrease_key(old, elements[i])
+        assert heap.list()[heap.index(elements[i])] == elements[i]
+
+    for i in range(100):
+        heap.pop()
+        assert heap.list()[heap.index(elements[-1])] == elements[-1]
+
+    assert heap.check_heap_property()
+    popped = [heap.pop() for i in range(len(heap))]
+    assert popped[-1] == elements[-1]
+    assert [el[1] for el in popped] == sorted(el[1] for el in popped)
+
 
 if __name__ == "__main__":
     test1()
-    test2()
\ No newline at end of file
+    test2()
+    test3()
\ No newline at end of file
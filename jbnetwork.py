@@ -3,9 +3,12 @@ Tools for creating and editing networks, and algorithms for computing their prop
 
 Classes:
 Network  -- a network of nodes
+DenseBitNetwork  -- a network stored as a bit-packed adjacency matrix
 RSTree  -- rooted spanning tree, created from a Network object
 """
-__all__ = ['Network', 'RSTree']
+__all__ = ['Network', 'DenseBitNetwork', 'RSTree']
+
+from array import array
 
 import jbheap as jbh
 
@@ -28,6 +31,7 @@ class Network:
     compute_node_cc -- compute clustering coefficient of a node
     map_ac -- map centrality for all nodes
     map_ac2 -- map centrality for all nodes, different implementation
+    from_edges -- create a network from a sequence of links
 
     Properties:
     nodes -- list of nodes in the network
@@ -44,40 +48,130 @@ class Network:
         Dictionary format: {node1:{node2:1, node3:1}}
         """
         self._rstree = None
+        self._csr = None
         if from_dict is None:
             self._net = {}
+            self._link_count = 0
         else:
             self._net = from_dict
+            # a self-loop is one link, but appears only once in the dicts
+            ends = sum(len(self._net[n]) for n in self._net)
+            loops = sum(1 for n in self._net if n in self._net[n])
+            self._link_count = (ends + loops) // 2
+
+        # Every node also gets a contiguous integer id when it is added:
+        # _labels[id] is the node and _ids maps it back. The CSR snapshot
+        # and the algorithms run on ids, so labels are only hashed here
+        # and when translating results.
+        self._labels = list(self._net)
+        self._ids = {node: i for i, node in enumerate(self._labels)}
+
+    @staticmethod
+    def from_edges(edges, nodes=()):
+        """Create a network from (node1, node2) pairs, all links of weight 1.
+
+        The adjacency dicts are filled directly rather than through
+        add_link, which is much faster for large generated networks.
+
+        Keyword arguments:
+        nodes -- nodes to create, linked or not, before adding the links
+        """
+        net = {node: {} for node in nodes}
+        for node1, node2 in edges:
+            net.setdefault(node1, {})[node2] = 1
+            net.setdefault(node2, {})[node1] = 1
+        return Network(from_dict=net)
 
     def __len__(self):
         return self.node_count
 
     def add_node(self, node):
-        """Create a new (unconnected) node in the graph."""
-        if node not in self._net:
-            self._net[node] = {}
+        """Create a new (unconnected) node in the graph.
+
+        Return True if the node was created, False if it already existed."""
+        if node in self._net:
+            return False
+        self._net[node] = {}
+        self._ids[node] = len(self._labels)
+        self._labels.append(node)
+        self._changed()
+        return True
 
     def add_link(self, node1, node2, weight=1):
         """Make a link between nodes.
 
         n1 and n2 are created if they did not already exist."""
-        self.add_node(node1)
-        self.add_node(node2)
-        self._net[node1][node2] = weight
-        self._net[node2][node1] = weight
+        links1 = self._net.get(node1)
+        if links1 is None:
+            self.add_node(node1)
+            links1 = self._net[node1]
+        links2 = self._net.get(node2)
+        if links2 is None:
+            self.add_node(node2)
+            links2 = self._net[node2]
+        if node2 not in links1:
+            self._link_count += 1
+        links1[node2] = weight
+        links2[node1] = weight
+        self._changed()
 
     def del_link(self, node1, node2):
         """Delete link between nodes"""
         del self._net[node1][node2]
-        del self._net[node2][node1]
+        if node1 != node2:
+            del self._net[node2][node1]
+        self._link_count -= 1
+        self._changed()
 
     def del_node(self, node):
         """Delete node and all links to it."""
+        self._link_count -= len(self._net[node])
         del self._net[node]
         for node2 in self._net:
             if node in self._net[node2]:
                 del self._net[node2][node]
 
+        # keep ids contiguous by giving the last id to the freed slot
+        i_node = self._ids.pop(node)
+        last = self._labels.pop()
+        if i_node < len(self._labels):
+            self._labels[i_node] = last
+            self._ids[last] = i_node
+        self._changed()
+
+    def _changed(self):
+        """Drop structures derived from the links, after any edit."""
+        self._csr = None
+        self._rstree = None
+
+    def _get_csr(self):
+        """
+        Return a compressed sparse row (CSR) snapshot of the network.
+
+        Returns (labels, ids, indptr, indices, weights), where node
+        labels[i] has id i (ids maps label -> id), its neighbors are the ids
+        in indices[indptr[i]:indptr[i+1]] and weights[k] is the weight of
+        the link to indices[k]. Traversals run over these flat arrays
+        instead of chasing the dict-of-dicts. The snapshot is built on
+        first use and rebuilt after the network is modified.
+        """
+        if self._csr is None:
+            self._csr = self._build_csr()
+        return self._csr
+
+    def _build_csr(self):
+        labels = list(self._labels)
+        ids = self._ids
+        indptr = array('l', [0])
+        indices = array('i')
+        weights = []
+        for node in labels:
+            links = self._net[node]
+            indices.extend([ids[nbor] for nbor in links])
+            weights.extend(links.values())
+            indptr.append(len(indices))
+        return labels, ids, indptr, indices, weights
+
     def link_weight(self, node1, node2):
         return self._net[node1][node2]
 
@@ -92,13 +186,17 @@ class Network:
                 self.del_node(node)
 
     def find_neighbors(self, node):
-        """Return list of neighbors of node."""
-        return [neighbor for neighbor in self._net[node]]
+        """Return neighbors of node, as a live view rather than a copy.
+
+        The view supports len(), iteration and O(1) membership tests; make
+        a list of it to index it or to edit the network while iterating.
+        """
+        return self._net[node].keys()
 
     @property
     def link_count(self):
         """Number of links in the network."""
-        return int(sum([len(self._net[n].values()) for n in self._net]) / 2)
+        return self._link_count
 
     @property
     def node_count(self):
@@ -119,22 +217,15 @@ class Network:
 
     def map_distance_to_node(self, node):
         """Map the distance between node n and every reachable node in the graph."""
-        open_list = [node]
-        distance_from_start = {}
-        distance_from_start[node] = 0
-        while len(open_list) > 0:
-            current = open_list[0]
-            del open_list[0]
-            for neighbor in self.find_neighbors(current):
-                if neighbor not in distance_from_start:
-                    distance_from_start[neighbor] = distance_from_start[current] + 1
-                    open_list.append(neighbor)
-        return distance_from_start
+        labels, ids, indptr, indices, _ = self._get_csr()
+        dist, order = _bfs_distances(indptr, indices, ids[node])
+        return {labels[i]: dist[i] for i in order}
 
     def compute_node_centrality(self, node):
         """Return the average distance from node to all other reachable nodes."""
-        distances = self.map_distance_to_node(node)
-        return float(sum(distances.values())/len(distances))
+        _, ids, indptr, indices, _ = self._get_csr()
+        dist, order = _bfs_distances(indptr, indices, ids[node])
+        return float(sum([dist[i] for i in order])/len(order))
 
     def map_ac(self, nodes='all'):
         """
@@ -207,7 +298,7 @@ class Network:
         kv = number of nodes neighboring n
         nv = number of links between neighbors of n
         """
-        neighbors = self.find_neighbors(node)
+        neighbors = list(self.find_neighbors(node))
         kv = len(neighbors)
         nv = 0
 
@@ -215,8 +306,9 @@ class Network:
             return 0
 
         for i in range(kv-1):
+            nbors_i = self.find_neighbors(neighbors[i])
             for j in range(i+1, kv):
-                if neighbors[j] in self.find_neighbors(neighbors[i]):
+                if neighbors[j] in nbors_i:
                     nv += 1
 
         return 2.0*nv/(kv*(kv-1))
@@ -238,28 +330,9 @@ class Network:
         return self._djikstra(node, lambda x,y: max(x,y))
 
     def _djikstra(self, node, func_new_dist):
-        dist_so_far = jbh.HeapOfTuples(1, elements=[(node, 0, 0)])
-        final_dist = {}
-        while len(dist_so_far) > 0:
-            current, dist, hops = dist_so_far.pop()
-            final_dist[current] = (dist, hops)
-
-            for nbor in self.find_neighbors(current):
-                if nbor not in final_dist:
-                    dist_so_far_list = dist_so_far.list()
-                    new_dist = func_new_dist(final_dist[current][0], self.link_weight(current, nbor))
-                    new_hops = final_dist[current][1] + 1
-                    try:
-                        # This is relying on implementation details of
-                        # jbheap - need to add interface to do this
-                        i_x = [n[0] for n in dist_so_far_list].index(nbor)
-                        if new_dist < dist_so_far_list[i_x][1]:
-                            dist_so_far._heap[i_x] = (nbor, new_dist, new_hops)
-                            dist_so_far._up_heapify(i_x)
-                    except ValueError:
-                        dist_so_far.insert((nbor, new_dist, new_hops))
-
-        return final_dist
+        labels, ids, indptr, indices, weights = self._get_csr()
+        dist, hops, order = _csr_djikstra(indptr, indices, weights, ids[node], func_new_dist)
+        return {labels[i]: (dist[i], hops[i]) for i in order}
 
     # def map_weighted_distances(self):
     #     """
@@ -274,10 +347,285 @@ class Network:
     #     pass
 
 
+def _iter_bits(mask):
+    """Yield the positions of the set bits of mask, lowest first."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+if hasattr(int, 'bit_count'):
+    _popcount = int.bit_count
+else:
+    def _popcount(mask):
+        """Number of set bits in mask."""
+        return bin(mask).count('1')
+
+
+class DenseBitNetwork(Network):
+    """
+    A network of integer nodes stored as a bit-packed adjacency matrix.
+
+    Row i of the matrix is an int whose bit j is set when nodes i and j
+    are linked, so adding a link is a bit OR and the neighbors of a node
+    are the set bits of its row. Memory is one bit per pair of nodes, which
+    pays off for dense networks (e.g. cliques); sparse networks are better
+    served by Network. Links are unweighted (weight 1).
+
+    Overridden methods:
+    add_node
+    add_link
+    del_link
+    del_node
+    link_weight
+    find_neighbors
+    compute_node_cc
+
+    New methods:
+    link_all -- link every pair of nodes
+    """
+    # pylint: disable=super-init-not-called
+    def __init__(self, size=0):
+        """Create a network of size unconnected nodes, numbered 0 to size-1."""
+        self._rstree = None
+        self._csr = None
+        self._rows = [0] * size
+        self._node_bits = (1 << size) - 1
+
+    def add_node(self, node):
+        """Create a new (unconnected) node; node must be a non-negative int.
+
+        Return True if the node was created, False if it already existed."""
+        if node < 0:
+            raise ValueError('DenseBitNetwork nodes must be non-negative ints')
+        if node >= len(self._rows):
+            self._rows.extend([0] * (node + 1 - len(self._rows)))
+        if self._node_bits >> node & 1:
+            return False
+        self._node_bits |= 1 << node
+        self._changed()
+        return True
+
+    def add_link(self, node1, node2, weight=1):
+        """Make a link between nodes.
+
+        n1 and n2 are created if they did not already exist."""
+        if weight != 1:
+            raise ValueError('DenseBitNetwork links are unweighted')
+        self.add_node(node1)
+        self.add_node(node2)
+        self._rows[node1] |= 1 << node2
+        self._rows[node2] |= 1 << node1
+        self._changed()
+
+    def del_link(self, node1, node2):
+        """Delete link between nodes"""
+        if not self._has_link(node1, node2):
+            raise KeyError((node1, node2))
+        self._rows[node1] &= ~(1 << node2)
+        self._rows[node2] &= ~(1 << node1)
+        self._changed()
+
+    def del_node(self, node):
+        """Delete node and all links to it."""
+        for nbor in _iter_bits(self._row(node)):
+            self._rows[nbor] &= ~(1 << node)
+        self._rows[node] = 0
+        self._node_bits &= ~(1 << node)
+        self._changed()
+
+    def link_all(self):
+        """Link every pair of (distinct) nodes, making the network a clique."""
+        for node in _iter_bits(self._node_bits):
+            self._rows[node] = self._node_bits & ~(1 << node)
+        self._changed()
+
+    def link_weight(self, node1, node2):
+        if not self._has_link(node1, node2):
+            raise KeyError((node1, node2))
+        return 1
+
+    def find_neighbors(self, node):
+        """Return list of neighbors of node."""
+        return list(_iter_bits(self._row(node)))
+
+    # pylint: disable=invalid-name
+    def compute_node_cc(self, node):
+        """Compute connectivity coefficient (cc) of node n.
+
+        Same as Network.compute_node_cc, but the links between neighbors
+        are counted by intersecting bit rows rather than pair by pair.
+        """
+        row = self._row(node)
+        kv = _popcount(row)
+
+        if kv < 2:
+            return 0
+
+        nv = sum(_popcount(self._rows[nbor] & row) for nbor in _iter_bits(row)) // 2
+        return 2.0*nv/(kv*(kv-1))
+
+    def _row(self, node):
+        """Bit row of node; KeyError if node is not in the network."""
+        if not (isinstance(node, int) and 0 <= node < len(self._rows)
+                and self._node_bits >> node & 1):
+            raise KeyError(node)
+        return self._rows[node]
+
+    def _has_link(self, node1, node2):
+        """Whether nodes are linked; KeyError if either is not in the network."""
+        self._row(node2)
+        return self._row(node1) >> node2 & 1
+
+    def _build_csr(self):
+        labels = self.nodes
+        ids = {node: i for i, node in enumerate(labels)}
+        indptr = array('l', [0])
+        indices = array('i')
+        for node in labels:
+            indices.extend([ids[nbor] for nbor in _iter_bits(self._rows[node])])
+            indptr.append(len(indices))
+        return labels, ids, indptr, indices, [1] * len(indices)
+
+    @property
+    def link_count(self):
+        """Number of links in the network."""
+        # a self-loop is one link, but sets only one bit
+        loops = sum(row >> node & 1 for node, row in enumerate(self._rows))
+        return (sum(map(_popcount, self._rows)) + loops) // 2
+
+    @property
+    def node_count(self):
+        """Number of nodes in the network."""
+        return _popcount(self._node_bits)
+
+    @property
+    def nodes(self):
+        """Nodes in the network."""
+        return list(_iter_bits(self._node_bits))
+
+
+def _bfs_distances(indptr, indices, source):
+    """
+    Hop distances from source in a CSR graph (see Network._get_csr).
+
+    Return (dist, order). dist[i] is the number of links on the shortest
+    path from source to node i, or -1 if there is none. order lists the
+    reached ids in the order they were visited.
+    """
+    dist = array('l', [-1]) * (len(indptr) - 1)
+    dist[source] = 0
+    # the queue only grows, so it is walked with a read index and ends
+    # up holding the visiting order
+    order = array('i', [source])
+    push = order.append
+    i_open = 0
+
+    while i_open < len(order):
+        current = order[i_open]
+        i_open += 1
+        next_dist = dist[current] + 1
+        for k in range(indptr[current], indptr[current+1]):
+            neighbor = indices[k]
+            if dist[neighbor] < 0:
+                dist[neighbor] = next_dist
+                push(neighbor)
+    return dist, order
+
+
+def _csr_djikstra(indptr, indices, weights, source, func_new_dist):
+    """
+    Lightest paths from source in a weighted CSR graph (see Network._get_csr).
+
+    The weight of a path is built link by link with
+    func_new_dist(weight_so_far, link_weight). Return (dist, hops, order):
+    dist[i] and hops[i] are the weight and number of links of the
+    lightest path to node i (None if there is none), and order lists the
+    reached ids in the order their path was settled.
+    """
+    n_nodes = len(indptr) - 1
+    dist = [None] * n_nodes
+    hops = [None] * n_nodes
+    settled = bytearray(n_nodes)
+    order = []
+    # heap entry of each node still in dist_so_far
+    queued = [None] * n_nodes
+    queued[source] = (source, 0, 0)
+    dist_so_far = jbh.HeapOfTuples(1, elements=[queued[source]])
+
+    while len(dist_so_far) > 0:
+        current, cur_dist, cur_hops = dist_so_far.pop()
+        queued[current] = None
+        settled[current] = 1
+        dist[current] = cur_dist
+        hops[current] = cur_hops
+        order.append(current)
+
+        for k in range(indptr[current], indptr[current+1]):
+            nbor = indices[k]
+            if not settled[nbor]:
+                new_dist = func_new_dist(cur_dist, weights[k])
+                entry = queued[nbor]
+                if entry is None:
+                    queued[nbor] = (nbor, new_dist, cur_hops + 1)
+                    dist_so_far.insert(queued[nbor])
+                elif new_dist < entry[1]:
+                    queued[nbor] = (nbor, new_dist, cur_hops + 1)
+                    dist_so_far.decrease_key(entry, queued[nbor])
+    return dist, hops, order
+
+
+def _bfs_tree(indptr, indices, root):
+    """
+    Breadth-first spanning tree of a CSR graph (see Network._get_csr).
+
+    Return (parent, order, red_links). parent[i] is the id of the tree
+    parent of node i, root for the root itself and -1 for nodes not
+    reachable from root. order lists the reached ids in the order they
+    were visited, so every node comes after its parent. red_links lists
+    each non-tree link once, as a pair of ids.
+    """
+    n_nodes = len(indptr) - 1
+    parent = array('i', [-1]) * n_nodes
+    visited = bytearray(n_nodes)
+    red_links = []
+
+    parent[root] = root
+    visited[root] = 1
+    # the queue only grows, so it is walked with a read index and ends
+    # up holding the visiting order
+    order = array('i', [root])
+    push = order.append
+    i_open = 0
+
+    while i_open < len(order):
+        current = order[i_open]
+        i_open += 1
+        for k in range(indptr[current], indptr[current+1]):
+            neighbor = indices[k]
+            if not visited[neighbor]:
+                visited[neighbor] = 1
+                parent[neighbor] = current
+                push(neighbor)
+            elif neighbor > current and neighbor != parent[current]:
+                # each link is seen from both ends; keep it from the lower
+                # id only. A visited neighbor that is not current's parent
+                # can't be its child either, since a child is claimed the
+                # one time current sees it.
+                red_links.append((current, neighbor))
+    return parent, order, red_links
+
+
 # pylint: disable=too-many-instance-attributes
 class RSTree:
     """ A rooted spanning tree, created from a Network object.
 
+    The tree is stored as arrays indexed by node id (see
+    Network._get_csr): the parent of each node, and the non-tree ("red")
+    links as a list of id pairs. The maps below are computed from them
+    in linear passes over the nodes in visiting order.
+
     Properties
     root
     network
@@ -296,77 +644,95 @@ class RSTree:
         self._desc_map = None
         self._min_po_map = None
         self._bridge_links = None
+        self._po = None
+        self._desc = None
+        self._max_po = None
+        self._min_po = None
+
+        # pylint: disable=protected-access
+        labels, ids, indptr, indices, _ = network._get_csr()
+        self._labels = labels
+        self._parent, self._order, self._red_links = _bfs_tree(indptr, indices, ids[root])
+
+    def _id_map(self, values):
+        """Turn an array indexed by node id into a map keyed by node."""
+        labels = self._labels
+        return {labels[i]: values[i] for i in self._order}
+
+    def _compute_po(self):
+        """Fill the descendant count and post-order rank arrays."""
+        parent = self._parent
+        order = self._order
+        n_nodes = len(parent)
+
+        # children come after their parent in order, so walking it
+        # backwards sees every subtree before the node above it
+        desc = array('l', [1]) * n_nodes
+        for node in reversed(order[1:]):
+            desc[parent[node]] += desc[node]
+
+        # a subtree takes the post-order ranks right after the subtrees
+        # of its earlier siblings; its root gets the last of them
+        first = array('l', [0]) * n_nodes
+        next_first = array('l', [0]) * n_nodes
+        for node in order[1:]:
+            first[node] = next_first[parent[node]]
+            next_first[parent[node]] += desc[node]
+            next_first[node] = first[node]
+
+        po = array('l', [0]) * n_nodes
+        for node in order:
+            po[node] = first[node] + desc[node]
+
+        self._desc = desc
+        self._po = po
+
+    def _compute_po_bounds(self):
+        """
+        Fill the highest and lowest post-order rank arrays.
 
-        tree = {root:{}}
-        marked = [root]
-        open_list = [root]
-
-        def add_link(node1, node2, color):
-            """Add link to tree."""
-            if not node1 in tree:
-                tree[node1] = {}
-            if not node2 in tree:
-                tree[node2] = {}
-            tree[node1][node2] = color
-            if color == 'red':
-                tree[node2][node1] = 'red'
-
-        while open_list != []:
-            current = open_list.pop(0)
-            neighbors = network.find_neighbors(current)
-
-            for neighbor in neighbors:
-                if neighbor not in marked:
-                    marked.append(neighbor)
-                    open_list.append(neighbor)
-                    add_link(current, neighbor, 'green')
-                elif neighbor not in tree[current] and current not in tree[neighbor]:
-                    add_link(current, neighbor, 'red')
-        self._tree = tree
+        Crossing a red link from a node reaches the whole subtree of the
+        other end, whose ranks run from po - desc + 1 to po.
+        """
+        if self._po is None:
+            self._compute_po()
+        parent = self._parent
+        order = self._order
+        po = self._po
+        desc = self._desc
+
+        max_po = array('l', po)
+        min_po = array('l', po)
+        for node1, node2 in self._red_links:
+            max_po[node1] = max(max_po[node1], po[node2])
+            max_po[node2] = max(max_po[node2], po[node1])
+            min_po[node1] = min(min_po[node1], po[node2] - desc[node2] + 1)
+            min_po[node2] = min(min_po[node2], po[node1] - desc[node1] + 1)
+
+        for node in reversed(order[1:]):
+            max_po[parent[node]] = max(max_po[parent[node]], max_po[node])
+            min_po[parent[node]] = min(min_po[parent[node]], min_po[node])
+
+        self._max_po = max_po
+        self._min_po = min_po
 
     @property
     def po_map(self):
         """Rank of nodes in post-order traversal"""
-        if self._po_map is not None:
-            return self._po_map
-
-        _po_map = {}
-
-        # pylint: disable=missing-docstring
-        def _rec_post_order(current, k):
-            linked = self._tree[current]
-            children = [n for n in linked if linked[n] == 'green']
-            for child in children:
-                k = _rec_post_order(child, k)
-            _po_map[current] = k
-            return k+1
-
-        _rec_post_order(self.root, 1)
-        self._po_map = _po_map
-        return _po_map
+        if self._po_map is None:
+            if self._po is None:
+                self._compute_po()
+            self._po_map = self._id_map(self._po)
+        return self._po_map
 
     @property
     def desc_map(self):
         """Map of number of descendants of each node in the tree."""
-        if self._desc_map is not None:
-            return self._desc_map
-
-        _desc_map = {}
-
-        # pylint: disable=missing-docstring
-        def _how_many_below(current):
-            linked = self._tree[current]
-            children = [n for n in linked if linked[n] == 'green']
-
-            descendants = 1
-            for child in children:
-                descendants += _how_many_below(child)
-            _desc_map[current] = descendants
-            return descendants
-
-        _how_many_below(self.root)
-        self._desc_map = _desc_map
-        return _desc_map
+        if self._desc_map is None:
+            if self._desc is None:
+                self._compute_po()
+            self._desc_map = self._id_map(self._desc)
+        return self._desc_map
 
     @property
     def max_po_map(self):
@@ -376,35 +742,11 @@ class RSTree:
         Meaning, any rode reachable through tree edges and at most one
         non-tree edge.
         """
-        if self._max_po_map is not None:
-            return self._max_po_map
-
-        _max_po_map = {}
-
-        # pylint: disable=missing-docstring
-        def _max_po_below(current, has_crossed_red):
-            linked = self._tree[current]
-            neighbors = [n for n in linked]
-
-            max_po = self.po_map[current]
-            for nbor in neighbors:
-                if linked[nbor] == 'green':
-                    max_po = max(max_po, _max_po_below(nbor, has_crossed_red))
-                elif linked[nbor] == 'red' and not has_crossed_red:
-                    max_po = max(max_po, _max_po_below(nbor, 1))
-
-            # the same node may be visited more than once because
-            # through different paths because of red links, so
-            # need to do this
-            if current in _max_po_map:
-                _max_po_map[current] = max(_max_po_map[current], max_po)
-            else:
-                _max_po_map[current] = max_po
-            return max_po
-
-        _max_po_below(self.root, 0)
-        self._max_po_map = _max_po_map
-        return _max_po_map
+        if self._max_po_map is None:
+            if self._max_po is None:
+                self._compute_po_bounds()
+            self._max_po_map = self._id_map(self._max_po)
+        return self._max_po_map
 
     @property
     def min_po_map(self):
@@ -414,35 +756,11 @@ class RSTree:
         Meaning, any rode reachable through tree edges and at most one
         non-tree edge.
         """
-        if self._min_po_map is not None:
-            return self._min_po_map
-
-        _min_po_map = {}
-
-        # pylint: disable=missing-docstring
-        def _min_po_below(current, has_crossed_red):
-            linked = self._tree[current]
-            neighbors = [n for n in linked]
-
-            min_po = self.po_map[current]
-            for nbor in neighbors:
-                if linked[nbor] == 'green':
-                    min_po = min(min_po, _min_po_below(nbor, has_crossed_red))
-                elif linked[nbor] == 'red' and not has_crossed_red:
-                    min_po = min(min_po, _min_po_below(nbor, 1))
-
-            # the same node may be visited more than once because
-            # through different paths because of red links, so
-            # need to do this
-            if current in _min_po_map:
-                _min_po_map[current] = min(_min_po_map[current], min_po)
-            else:
-                _min_po_map[current] = min_po
-            return min_po
-
-        _min_po_below(self.root, 0)
-        self._min_po_map = _min_po_map
-        return _min_po_map
+        if self._min_po_map is None:
+            if self._min_po is None:
+                self._compute_po_bounds()
+            self._min_po_map = self._id_map(self._min_po)
+        return self._min_po_map
 
     @property
     def bridge_links(self):
@@ -455,22 +773,19 @@ class RSTree:
         if self._bridge_links is not None:
             return self._bridge_links
 
-        _bridge_links = []
+        if self._max_po is None:
+            self._compute_po_bounds()
+        labels = self._labels
+        parent = self._parent
+        po = self._po
+        desc = self._desc
+        max_po = self._max_po
+        min_po = self._min_po
 
-        # pylint: disable=missing-docstring
-        def _is_bridge_link(node1, node2):
-            if not self._tree[node1][node2] == 'green':
-                return False
-            if not self.max_po_map[node2] <= self.po_map[node2]:
-                return False
-            if not self.min_po_map[node2] > (self.po_map[node2] - self.desc_map[node2]):
-                return False
-            return True
-
-        for node in self._tree:
-            for nbor in self._tree[node]:
-                if _is_bridge_link(node, nbor):
-                    _bridge_links.append((node, nbor))
+        _bridge_links = []
+        for node in self._order[1:]:
+            if max_po[node] <= po[node] and min_po[node] > po[node] - desc[node]:
+                _bridge_links.append((labels[parent[node]], labels[node]))
 
         self._bridge_links = _bridge_links
         return _bridge_links
@@ -493,11 +808,33 @@ def test():
     for edge in edges:
         test_net.add_link(edge[0], edge[1], weight=edge[2])
 
+    assert test_net.add_node('h')
+    assert not test_net.add_node('h')
+    test_net.del_node('h')
     test_net.del_link('a', 'b')
     test_net.add_link('a', 'b', weight=10)
 
     assert test_net.node_count == 7
     assert test_net.link_count == 9
+    test_net.add_link('a', 'b', weight=10)
+    assert test_net.link_count == 9
+    edges_net = Network.from_edges([edge[:2] for edge in edges], nodes=['h'])
+    assert edges_net.link_count == 9
+    assert edges_net.node_count == 8
+
+    # a self-loop counts as one link, however it was added
+    loop_net = Network()
+    loop_net.add_link('a', 'a')
+    loop_net.add_link('a', 'a')
+    loop_net.add_link('a', 'b')
+    assert loop_net.link_count == 2
+    assert Network(from_dict={'a': {'a': 1, 'b': 1}, 'b': {'a': 1}}).link_count == 2
+    assert Network.from_edges([('a', 'a')]).link_count == 1
+    loop_net.del_link('a', 'a')
+    assert loop_net.link_count == 1
+    loop_net.add_link('b', 'b')
+    loop_net.del_node('b')
+    assert loop_net.link_count == 0
     assert set(test_net.find_neighbors('a')) == set(['b', 'd'])
     assert test_net.link_weight('a', 'b') == 10
     assert 'g' in test_net.nodes
@@ -510,11 +847,64 @@ def test():
     dist_peak_map = test_net.map_lowest_peak_to_node('a')
     assert dist_peak_map['f'] == (4, 5)
     assert test_net.bridge_links == [('e', 'g')] or test_net.bridge_links == [('g', 'e')]
+
+    # tree a-{d-c-e-g, b-f}, red links b-d, b-c, e-f
+    tree = RSTree(test_net, 'a')
+    assert tree.po_map == {'g': 1, 'e': 2, 'c': 3, 'd': 4, 'f': 5, 'b': 6, 'a': 7}
+    assert tree.desc_map == {'a': 7, 'b': 2, 'c': 3, 'd': 4, 'e': 2, 'f': 1, 'g': 1}
+    assert tree.max_po_map == {'a': 7, 'b': 6, 'c': 6, 'd': 6, 'e': 5, 'f': 5, 'g': 1}
+    assert tree.min_po_map == {n: 1 for n in 'abcdefg'}
+
+    # two triangles joined by the link 2-3: tree 0-{1, 2-3-{4, 5}},
+    # red links 1-2 and 4-5
+    tree = RSTree(Network.from_edges([(0, 1), (1, 2), (2, 0), (2, 3), (3, 4), (4, 5), (5, 3)]), 0)
+    assert tree.po_map == {1: 1, 4: 2, 5: 3, 3: 4, 2: 5, 0: 6}
+    assert tree.desc_map == {0: 6, 1: 1, 2: 4, 3: 3, 4: 1, 5: 1}
+    assert tree.max_po_map == {0: 6, 1: 5, 2: 5, 3: 4, 4: 3, 5: 3}
+    assert tree.min_po_map == {0: 1, 1: 1, 2: 1, 3: 2, 4: 2, 5: 2}
+    assert tree.bridge_links == [(2, 3)]
     ac_map = test_net.map_ac()
     assert ac_map['a'] == 13/7
     ac_map2 = test_net.map_ac2()
     assert ac_map2['a'] == 13/7
+
+
+def test_dense():
+    test_net = DenseBitNetwork(5)
+    test_net.link_all()
+
+    assert test_net.node_count == 5
+    assert test_net.link_count == 10
+    assert test_net.find_neighbors(0) == [1, 2, 3, 4]
+    assert test_net.compute_node_cc(0) == 1
+    assert test_net.map_distance_to_node(0)[4] == 1
+
+    test_net.del_node(4)
+    test_net.del_link(0, 1)
+    test_net.add_link(2, 6)
+
+    assert test_net.nodes == [0, 1, 2, 3, 6]
+    assert test_net.link_count == 6
+    assert test_net.map_distance_to_node(0)[1] == 2
+    assert test_net.map_distance_to_node(0)[6] == 2
+    assert test_net.compute_node_cc(2) == 2.0*2/(4*3)
+    test_net.add_link(3, 3)
+    assert test_net.link_count == 7
+    test_net.del_link(3, 3)
+
+    for node in (4, 7, -1, 'a'):
+        for method, args in ((test_net.find_neighbors, (node,)),
+                             (test_net.link_weight, (0, node)),
+                             (test_net.del_link, (node, 0)),
+                             (test_net.del_node, (node,))):
+            try:
+                method(*args)
+            except KeyError:
+                pass
+            else:
+                assert False, 'no KeyError for absent node {}'.format(node)
     
 
 if __name__ == '__main__':
-    test()
\ No newline at end of file
+    test()
+    test_dense()
\ No newline at end of file
@@ -10,79 +10,70 @@ build_clique_network
 build_hypercube_network
 build_grid_network
 """
+import math
+import random
+
 import jbnetwork as jbn
 
 def build_star_network(size):
     """Build a star network. Returns Network object."""
-    network = jbn.Network()
-    for i in range(1, size):
-        network.add_link(0, i)
-    return network
+    return jbn.Network.from_edges((0, i) for i in range(1, size))
 
 
 def build_chain_network(size):
     """Build a chain network. Returns Network object."""
-    network = jbn.Network()
-    for i in range(size-1):
-        network.add_link(i, i+1)
-    return network
+    return jbn.Network.from_edges(zip(range(size-1), range(1, size)))
 
 
 def build_ring_network(size):
     """Build a ring network. Returns Network object."""
-    network = jbn.Network()
-    for i in range(size-1):
-        network.add_link(i, i+1)
-    network.add_link(0, size-1)
-    return network
+    edges = list(zip(range(size-1), range(1, size)))
+    edges.append((0, size-1))
+    return jbn.Network.from_edges(edges)
 
 
 def build_random_network(size, prob):
     """Build a random (Erdos-Renyi) network. Returns Network object."""
-    network = jbn.Network()
-    for i in range(size):
-        network.add_node(i)
-    for i in range(size-1):
-        for j in range(i+1, size):
-            if random.random() < prob:
-                network.add_link(i, j)
-    return network
+    edges = []
+    if prob <= 0:
+        return jbn.Network.from_edges(edges, nodes=range(size))
+
+    # Rather than drawing once per pair, jump from one link to the next:
+    # the number of pairs skipped between links is geometrically
+    # distributed, so the cost is O(size + links) instead of O(size^2)
+    # (Batagelj & Brandes, "Efficient generation of large random networks").
+    log_q = math.log1p(-prob) if prob < 1 else None
+    i, j = 1, -1
+    while i < size:
+        j += 1
+        if log_q is not None:
+            j += int(math.log1p(-random.random()) / log_q)
+        while j >= i and i < size:
+            j -= i
+            i += 1
+        if i < size:
+            edges.append((i, j))
+    return jbn.Network.from_edges(edges, nodes=range(size))
 
 
 def build_clique_network(size):
-    """Build a clique network. Returns Network object."""
-    network = jbn.Network()
-    for i in range(size-1):
-        for j in range(i+1, size):
-            network.add_link(i, j)
+    """Build a clique network. Returns DenseBitNetwork object."""
+    network = jbn.DenseBitNetwork(size)
+    network.link_all()
     return network
 
 
 def build_hypercube_network(size):
-    """Build a hypercube network. Returns Network object."""
-    # pylint: disable=missing-docstring
-    def _rec_build_hc_net(size):
-        if size == 1:
-            return {0:{}}
+    """Build a hypercube network. Returns Network object.
 
-        network = {}
-        network1 = _rec_build_hc_net(size/2)
-
-        for node1 in network1:
-            network[node1] = network1[node1]
-            network[node1 + size/2] = {}
-            for node2 in network1[node1]:
-                network[node1 + size/2][node2 + size/2] = 1
-
-            network[node1][node1 + size/2] = 1
-            network[node1 + size/2][node1] = 1
-        return network
-
-    # Find largest power of 2 <= size
-    pow2size = 2**int(math.log(size, 2))
-
-    network = _rec_build_hc_net(pow2size)
-    return Network(from_dict=network)
+    The hypercube has the largest power of 2 <= size nodes, and two nodes
+    are linked when their numbers differ by exactly one bit.
+    """
+    dim = size.bit_length() - 1
+    network = {}
+    for node in range(1 << dim):
+        network[node] = {node ^ (1 << bit): 1 for bit in range(dim)}
+    return jbn.Network(from_dict=network)
 
 
 def build_grid_network(dim):
@@ -91,10 +82,61 @@ def build_grid_network(dim):
     arguments
     dim -- (x, y) tuple of dimensions
     """
-    network = jbn.Network()
-    for node in range(size[0] * size[1]):
-        if (node+1) % size[0] != 0:
-            network.add_link(node, node+1)
-        if node < (size[1] - 1)*size[0]:
-            network.add_link(node, node+size[0])
-    return network
\ No newline at end of file
+    width, height = dim
+    edges = [(node, node+1) for node in range(width*height) if (node+1) % width != 0]
+    edges.extend((node, node+width) for node in range((height-1)*width))
+    return jbn.Network.from_edges(edges)
+
+def test():
+    for network, nodes, links in [
+            (build_star_network(5), 5, 4),
+            (build_chain_network(5), 5, 4),
+            (build_ring_network(5), 5, 5),
+            (build_grid_network((3, 4)), 12, 17),
+            (build_hypercube_network(8), 8, 12),
+            (build_hypercube_network(100), 64, 192),
+            (build_clique_network(6), 6, 15)]:
+        assert network.node_count == nodes
+        assert network.link_count == links
+
+    assert set(build_grid_network((3, 4)).find_neighbors(4)) == set([1, 3, 5, 7])
+    assert set(build_hypercube_network(8).find_neighbors(5)) == set([4, 7, 1])
+
+    network = build_random_network(30, 0)
+    assert network.node_count == 30
+    assert network.link_count == 0
+
+    # log(1 - prob) would round to 0 here
+    network = build_random_network(50, 1e-17)
+    assert network.node_count == 50
+    assert network.link_count == 0
+
+    network = build_random_network(30, 1)
+    assert network.node_count == 30
+    assert network.link_count == 30*29//2
+
+    network = build_random_network(200, 0.05)
+    assert network.nodes == list(range(200))
+    for node in network.nodes:
+        for nbor in network.find_neighbors(node):
+            assert nbor != node
+            assert node in network.find_neighbors(nbor)
+
+    # every pair, including the first and last ones the skips can reach,
+    # must be linked with probability prob
+    random.seed(0)
+    runs = 2000
+    pair_counts = {}
+    for _ in range(runs):
+        network = build_random_network(6, 0.3)
+        for node in network.nodes:
+            for nbor in network.find_neighbors(node):
+                if node < nbor:
+                    pair_counts[(node, nbor)] = pair_counts.get((node, nbor), 0) + 1
+    assert len(pair_counts) == 6*5//2
+    for count in pair_counts.values():
+        assert 0.25 < count/runs < 0.35
+
+
+if __name__ == '__main__':
+    test()